@@ -1,13 +1,21 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
+from werkzeug.exceptions import RequestEntityTooLarge
 import os
 from dotenv import load_dotenv
 import requests
+import hashlib
 import json
+import sys
 from pathlib import Path
 
 
 BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR / 'lib'))
+
+from Dijkstra import CampusNavigator
+from reloader import FileWatcher, ReloadableFile
+from singleflight import SingleFlight, payload_key
 
 load_dotenv(BASE_DIR / '.env.local')
 load_dotenv(Path(__file__).resolve().parent / '.env')
@@ -16,14 +24,37 @@ app = Flask(__name__)
 CORS(app)
 
 OPENROUTER_API_KEY = os.getenv('NEXT_OPENROUTER_API')
-OPENROUTER_API_URL = 'https://openrouter.ai/api/v1/chat/completions'
+OPENROUTER_API_URL = os.getenv('NEXT_OPENROUTER_ENDPOINT', 'https://openrouter.ai/api/v1/chat/completions')
 
 OCR_API_KEY = os.getenv('NEXT_OCR_API_KEY')
 OCR_ENDPOINT = os.getenv('NEXT_OCR_ENDPOINT')
 
+ADMIN_TOKEN = os.getenv('NEXT_ADMIN_TOKEN')
+RESTRICTIONS_FILE = os.getenv('NEXT_RESTRICTIONS_FILE', str(Path(app.instance_path) / 'restricted-rooms.bin'))
+RELOAD_INTERVAL = float(os.getenv('NEXT_RELOAD_INTERVAL', '2'))
+UPSTREAM_TIMEOUT = float(os.getenv('NEXT_UPSTREAM_TIMEOUT', '30'))
+MAX_UPLOAD_MB = float(os.getenv('NEXT_MAX_UPLOAD_MB', '10'))
+app.config['MAX_CONTENT_LENGTH'] = int(MAX_UPLOAD_MB * 1024 * 1024)
+
+
+def load_json(path, previous):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def load_navigator(path, previous):
+    os.makedirs(os.path.dirname(RESTRICTIONS_FILE), exist_ok=True)
+    return CampusNavigator(path, restrictions_path=RESTRICTIONS_FILE, previous=previous)
 
-with open(BASE_DIR / 'lib' / 'botModel.json', 'r') as f:
-    bot_models = json.load(f)
+bot_models_file = ReloadableFile(BASE_DIR / 'lib' / 'botModel.json', load_json)
+navigator_file = ReloadableFile(BASE_DIR / 'lib' / 'PathFinding.json', load_navigator)
+file_watcher = FileWatcher([bot_models_file, navigator_file], interval=RELOAD_INTERVAL).start()
+
+chat_flight = SingleFlight()
+ocr_flight = SingleFlight()
+
+@app.errorhandler(RequestEntityTooLarge)
+def request_too_large(e):
+    return jsonify({'error': f'Request body exceeds the {MAX_UPLOAD_MB:g} MB limit'}), 413
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
@@ -31,7 +62,7 @@ def health_check():
 
 @app.route('/api/models', methods=['GET'])
 def get_models():
-    return jsonify(bot_models)
+    return jsonify(bot_models_file.get())
 
 @app.route('/api/chat', methods=['POST'])
 def chat():
@@ -98,13 +129,22 @@ def chat():
             'messages': messages
         }
         
-        response = requests.post(OPENROUTER_API_URL, headers=headers, json=payload)
+        def call_openrouter():
+            try:
+                response = requests.post(OPENROUTER_API_URL, headers=headers, json=payload, timeout=UPSTREAM_TIMEOUT)
+            except requests.Timeout:
+                return {'error': 'OpenRouter request timed out'}, 504
+            if response.status_code == 200:
+                return response.json(), 200
+            return {'error': response.text}, response.status_code
         
-        if response.status_code == 200:
-            return jsonify(response.json())
-        else:
-            return jsonify({'error': response.text}), response.status_code
+        body, status = chat_flight.do(payload_key('chat', payload), call_openrouter, timeout=UPSTREAM_TIMEOUT)
+        return jsonify(body), status
             
+    except RequestEntityTooLarge:
+        raise
+    except TimeoutError:
+        return jsonify({'error': 'OpenRouter request timed out'}), 504
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -115,6 +155,10 @@ def ocr():
         if 'file' in request.files:
             
             file = request.files['file']
+            digest = hashlib.sha256()
+            for chunk in iter(lambda: file.stream.read(64 * 1024), b''):
+                digest.update(chunk)
+            file.stream.seek(0)
             
             payload = {
                 'apikey': OCR_API_KEY,
@@ -126,7 +170,12 @@ def ocr():
                 'file': (file.filename, file.stream, file.content_type)
             }
             
-            response = requests.post(OCR_ENDPOINT, data=payload, files=files)
+            key = payload_key('ocr-file', {
+                'sha256': digest.hexdigest(),
+                'filename': file.filename,
+                'content_type': file.content_type,
+                'payload': payload
+            })
             
         elif 'url' in request.json:
            
@@ -138,13 +187,23 @@ def ocr():
                 'language': 'eng',
                 'isOverlayRequired': False,
             }
-            
-            response = requests.post(OCR_ENDPOINT, data=payload)
+            files = None
+            key = payload_key('ocr-url', payload)
         else:
             return jsonify({'error': 'No image file or URL provided'}), 400
         
-        if response.status_code == 200:
-            result = response.json()
+        def call_ocr():
+            try:
+                response = requests.post(OCR_ENDPOINT, data=payload, files=files, timeout=UPSTREAM_TIMEOUT)
+            except requests.Timeout:
+                return None, 504
+            if response.status_code == 200:
+                return response.json(), 200
+            return None, response.status_code
+        
+        result, status = ocr_flight.do(key, call_ocr, timeout=UPSTREAM_TIMEOUT)
+        
+        if status == 200:
             
             if result.get('IsErroredOnProcessing'):
                 return jsonify({'error': result.get('ErrorMessage', ['Unknown error'])[0]}), 400
@@ -160,10 +219,57 @@ def ocr():
                 'full_result': result
             })
         else:
-            return jsonify({'error': 'OCR API request failed'}), response.status_code
+            return jsonify({'error': 'OCR API request failed'}), status
             
+    except RequestEntityTooLarge:
+        raise
+    except TimeoutError:
+        return jsonify({'error': 'OCR API request timed out'}), 504
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/admin/coalescing', methods=['GET'])
+def coalescing_stats():
+    if not ADMIN_TOKEN or request.headers.get('X-Admin-Token') != ADMIN_TOKEN:
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    return jsonify({
+        'chat': chat_flight.stats(),
+        'ocr': ocr_flight.stats()
+    })
+
+def restricted_rooms_response(navigator):
+    return jsonify({
+        'version': navigator.restrictions_version,
+        'rooms': [
+            {'id': room_id, 'name': navigator.nodes[room_id].name}
+            for room_id in sorted(navigator.restricted_rooms)
+        ]
+    })
+
+@app.route('/api/admin/restricted-rooms', methods=['GET', 'POST'])
+def restricted_rooms():
+    if not ADMIN_TOKEN or request.headers.get('X-Admin-Token') != ADMIN_TOKEN:
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    navigator = navigator_file.get()
+    if request.method == 'GET':
+        return restricted_rooms_response(navigator)
+    
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'JSON object body is required'}), 400
+    
+    room = data.get('room')
+    restricted = data.get('restricted', True)
+    
+    if not isinstance(room, str) or not room or not isinstance(restricted, bool):
+        return jsonify({'error': 'room and boolean restricted are required'}), 400
+    
+    if not navigator.mark_room_restricted(room, restricted, exact=True):
+        return jsonify({'error': f'Unknown room: {room}'}), 404
+    
+    return restricted_rooms_response(navigator)
+
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
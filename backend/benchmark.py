@@ -0,0 +1,265 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+
+from stub_servers import StubConfig, openrouter_stub, ocr_stub
+
+
+BACKEND_DIR = Path(__file__).resolve().parent
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100.0
+    lower = int(k)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (k - lower)
+
+
+def read_rss_mb(pid):
+    try:
+        import psutil
+        return psutil.Process(pid).memory_info().rss / (1024 * 1024)
+    except ImportError:
+        pass
+    except Exception:
+        return None
+
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+class MemorySampler:
+    def __init__(self, pid, interval=0.1):
+        self.pid = pid
+        self.interval = interval
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            rss = read_rss_mb(self.pid)
+            if rss is not None:
+                self.samples.append(rss)
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+class Backend:
+    def __init__(self, port, openrouter_url, ocr_url):
+        self.port = port
+        self.base_url = f'http://127.0.0.1:{port}/api'
+        self.state_dir = tempfile.TemporaryDirectory(prefix='solaris-bench-')
+        self.env = dict(os.environ)
+        self.env.update({
+            'NEXT_OPENROUTER_API': 'bench-key',
+            'NEXT_OPENROUTER_ENDPOINT': openrouter_url,
+            'NEXT_OCR_API_KEY': 'bench-key',
+            'NEXT_OCR_ENDPOINT': ocr_url,
+            'NEXT_ADMIN_TOKEN': 'bench-admin',
+            'NEXT_RELOAD_INTERVAL': '0',
+            'NEXT_RESTRICTIONS_FILE': str(Path(self.state_dir.name) / 'restricted-rooms.bin'),
+        })
+        self.process = None
+
+    def start(self, timeout=20.0):
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'flask', '--app', 'app', 'run',
+             '--port', str(self.port), '--no-reload', '--no-debugger', '--with-threads'],
+            cwd=BACKEND_DIR, env=self.env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError('Backend exited during startup')
+            try:
+                if requests.get(f'{self.base_url}/health', timeout=1).status_code == 200:
+                    return self
+            except requests.ConnectionError:
+                pass
+            time.sleep(0.1)
+
+        self.stop()
+        raise RuntimeError(f'Backend did not become healthy within {timeout}s')
+
+    def coalescing_stats(self):
+        response = requests.get(f'{self.base_url}/admin/coalescing', headers={'X-Admin-Token': 'bench-admin'})
+        return response.json() if response.status_code == 200 else None
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self.state_dir.cleanup()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def make_request(scenario, base_url, session, index):
+    if scenario == 'chat':
+        payload = {
+            'model': 'x-ai/grok-4.1-fast:free',
+            'messages': [{'role': 'user', 'content': f'Where is the library? #{index}'}]
+        }
+        return session.post(f'{base_url}/chat', json=payload)
+    if scenario == 'navigation':
+        payload = {
+            'model': 'x-ai/grok-4.1-fast:free',
+            'messages': [{'role': 'user', 'content': 'How do I get from MIS to the Library?'}],
+            'navigation_mode': True
+        }
+        return session.post(f'{base_url}/chat', json=payload)
+    if scenario == 'ocr':
+        files = {'file': ('handout.png', b'\x89PNG\r\n' + bytes(index % 256 for _ in range(2048)), 'image/png')}
+        return session.post(f'{base_url}/ocr', files=files)
+    if scenario == 'health':
+        return session.get(f'{base_url}/health')
+    if scenario == 'stream':
+        # chat() does not stream, so this drives the OpenRouter stub's SSE
+        # path directly to measure streaming delivery on its own.
+        payload = {
+            'model': 'x-ai/grok-4.1-fast:free',
+            'messages': [{'role': 'user', 'content': f'Describe the way to the library in detail #{index}'}],
+            'stream': True
+        }
+        response = session.post(base_url, json=payload, stream=True)
+        with response:
+            for line in response.iter_lines():
+                if line == b'data: [DONE]':
+                    break
+        return response
+    raise ValueError(f'Unknown scenario: {scenario}')
+
+
+def run_scenario(scenario, base_url, total, concurrency):
+    local = threading.local()
+
+    def worker(index):
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        start = time.perf_counter()
+        try:
+            status = make_request(scenario, base_url, local.session, index).status_code
+        except requests.RequestException:
+            status = 'error'
+        return time.perf_counter() - start, status
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(worker, range(total)))
+    elapsed = time.perf_counter() - started
+
+    latencies = [latency * 1000 for latency, _ in results]
+    return {
+        'scenario': scenario,
+        'requests': total,
+        'concurrency': concurrency,
+        'elapsed_s': round(elapsed, 3),
+        'throughput_rps': round(total / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'max_ms': round(max(latencies), 2) if latencies else 0.0,
+        'status_codes': dict(Counter(str(status) for _, status in results)),
+    }
+
+
+def print_report(results):
+    print(f"{'scenario':12} {'reqs':>6} {'conc':>5} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'rss MB':>8}  status")
+    print('-' * 90)
+    for r in results:
+        rss = f"{r['rss_peak_mb']:.1f}" if r.get('rss_peak_mb') is not None else 'n/a'
+        print(f"{r['scenario']:12} {r['requests']:>6} {r['concurrency']:>5} {r['throughput_rps']:>8} "
+              f"{r['p50_ms']:>9} {r['p95_ms']:>9} {r['p99_ms']:>9} {rss:>8}  {r['status_codes']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Offline load test for the Flask backend using local OpenRouter/OCR stubs')
+    parser.add_argument('--scenarios', default='health,chat,navigation,ocr,stream',
+                        help='Comma-separated list of: health, chat, navigation, ocr, stream '
+                             '(stream calls the OpenRouter stub directly; chat() does not stream)')
+    parser.add_argument('--requests', type=int, default=200, help='Requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--port', type=int, default=5055, help='Port for the backend under test')
+    parser.add_argument('--latency-ms', type=float, default=50.0, help='Stub upstream latency')
+    parser.add_argument('--jitter-ms', type=float, default=10.0, help='Stub upstream latency jitter')
+    parser.add_argument('--rate-limit-ratio', type=float, default=0.0,
+                        help='Fraction of upstream calls answered with 429')
+    parser.add_argument('--stream-chunks', type=int, default=8,
+                        help='Number of SSE chunks the OpenRouter stub sends for streamed replies')
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--json', dest='json_path', help='Write results to this JSON file')
+    args = parser.parse_args(argv)
+
+    scenarios = [s.strip() for s in args.scenarios.split(',') if s.strip()]
+    openrouter_config = StubConfig(args.latency_ms, args.jitter_ms, args.rate_limit_ratio,
+                                   stream_chunks=args.stream_chunks, seed=args.seed)
+    ocr_config = StubConfig(args.latency_ms, args.jitter_ms, args.rate_limit_ratio, seed=args.seed + 1)
+
+    print("=== Offline Backend Benchmark ===\n")
+    results = []
+    with openrouter_stub(openrouter_config) as openrouter, ocr_stub(ocr_config) as ocr:
+        openrouter_url = f'{openrouter.url}/api/v1/chat/completions'
+        with Backend(args.port, openrouter_url, f'{ocr.url}/parse/image') as backend:
+            idle_rss = read_rss_mb(backend.process.pid)
+            for scenario in scenarios:
+                with MemorySampler(backend.process.pid) as sampler:
+                    target = openrouter_url if scenario == 'stream' else backend.base_url
+                    result = run_scenario(scenario, target, args.requests, args.concurrency)
+                result['rss_idle_mb'] = round(idle_rss, 1) if idle_rss is not None else None
+                result['rss_peak_mb'] = round(max(sampler.samples), 1) if sampler.samples else None
+                results.append(result)
+            coalescing = backend.coalescing_stats()
+
+        print_report(results)
+        print(f"\nUpstream stub calls: openrouter={openrouter_config.requests} "
+              f"(429s: {openrouter_config.rate_limited}), ocr={ocr_config.requests} "
+              f"(429s: {ocr_config.rate_limited})")
+        if coalescing:
+            print(f"Coalesced duplicate upstream calls: chat={coalescing['chat']['coalesced']}, "
+                  f"ocr={coalescing['ocr']['coalesced']}")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    return results
+
+
+if __name__ == '__main__':
+    main()
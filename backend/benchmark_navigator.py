@@ -0,0 +1,243 @@
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR / 'lib'))
+
+from Dijkstra import CampusNavigator  # noqa: E402
+from benchmark import percentile  # noqa: E402
+
+
+def generate_campus(buildings=10, floors=5, rooms_per_floor=200, stairwells=1, faculty=500, seed=1234):
+    rng = random.Random(seed)
+    data = {
+        'collegeName': 'Generated Campus',
+        'buildingName': f'{buildings} buildings',
+        'floors': {},
+        'faculty': [],
+        'corridors': [],
+        'stairConnections': []
+    }
+
+    for b in range(buildings):
+        for f in range(floors):
+            floor_key = f'b{b}-f{f}'
+            locations = []
+            for r in range(rooms_per_floor):
+                room_type = 'department' if r % 25 == 0 else 'room'
+                location = {
+                    'id': f'b{b}-f{f}-r{r}',
+                    'name': f'Room B{b}F{f}-{r}',
+                    'type': room_type,
+                    'description': f'Generated room {r} on floor {f} of building {b}'
+                }
+                if room_type == 'department':
+                    location['name'] = f'Department B{b}F{f}-{r}'
+                    location['services'] = [
+                        {'name': f'Service {b}.{f}.{r}.{s}', 'description': 'Generated service'}
+                        for s in range(3)
+                    ]
+                locations.append(location)
+
+            for s in reversed(range(stairwells)):
+                position = rooms_per_floor * (2 * s + 1) // (2 * stairwells)
+                locations.insert(position, {
+                    'id': f'stairs{s}-b{b}-f{f}',
+                    'name': f'Stairs {s} B{b}F{f}',
+                    'type': 'navigation'
+                })
+                if f > 0:
+                    data['stairConnections'].append([f'stairs{s}-b{b}-f{f - 1}', f'stairs{s}-b{b}-f{f}', 3])
+
+            data['floors'][floor_key] = {'name': f'Building {b} Floor {f}', 'level': f, 'locations': locations}
+            data['corridors'].append({'locations': [loc['id'] for loc in locations]})
+
+        if b > 0:
+            data['stairConnections'].append([f'stairs0-b{b - 1}-f0', f'stairs0-b{b}-f0', 10])
+
+    floor_keys = list(data['floors'])
+    for i in range(faculty):
+        floor_key = rng.choice(floor_keys)
+        room = rng.choice(data['floors'][floor_key]['locations'])
+        data['faculty'].append({
+            'id': f'faculty-{i}',
+            'name': f'Professor {i}',
+            'primaryLocation': {'floor': floor_key, 'room': room['id']},
+            'schedule': 'Regular weekdays'
+        })
+
+    return data
+
+
+def write_campus(data):
+    handle = tempfile.NamedTemporaryFile('w', suffix='.json', delete=False)
+    with handle:
+        json.dump(data, handle)
+    return handle.name
+
+
+def time_calls(fn, args_list):
+    timings = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        'calls': len(timings),
+        'mean_ms': round(sum(timings) / len(timings), 4),
+        'p50_ms': round(percentile(timings, 50), 4),
+        'p95_ms': round(percentile(timings, 95), 4),
+        'p99_ms': round(percentile(timings, 99), 4),
+    }
+
+
+def run(buildings, floors, rooms_per_floor, queries, seed, stairwells=1, hierarchy=False, stats=False):
+    rng = random.Random(seed)
+    data = generate_campus(buildings, floors, rooms_per_floor, stairwells, seed=seed)
+    path = write_campus(data)
+    results = {}
+
+    try:
+        tracemalloc.start()
+        start = time.perf_counter()
+        navigator = CampusNavigator(path)
+        build_ms = (time.perf_counter() - start) * 1000
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        Path(path).unlink()
+
+    if stats:
+        collector = navigator.enable_stats()
+
+    results['construction'] = {
+        'nodes': len(navigator.nodes),
+        'edges': sum(len(edges) for edges in navigator.graph.values()) // 2,
+        'build_ms': round(build_ms, 2),
+        'peak_memory_mb': round(peak / (1024 * 1024), 2),
+    }
+
+    rooms = [node.name for node in navigator.nodes.values() if node.type != 'navigation']
+    pairs = [(rng.choice(rooms), rng.choice(rooms)) for _ in range(queries)]
+    results['navigate'] = time_calls(navigator.navigate, pairs)
+
+    exact = [(rng.choice(rooms),) for _ in range(queries)]
+    results['find_location_exact'] = time_calls(navigator.find_location, exact)
+
+    misses = [(f'nowhere {i}',) for i in range(max(1, queries // 10))]
+    results['find_location_miss'] = time_calls(navigator.find_location, misses)
+
+    terms = [(term,) for term in ['service', 'department', 'room b1f', 'professor 4', 'stairs']]
+    results['search_all'] = time_calls(navigator.search_all, terms * max(1, queries // 50))
+
+    if hierarchy:
+        results.update(run_hierarchy(navigator, rng, queries))
+
+    if stats:
+        results['search_stats'] = {name: entry['counters'] for name, entry in collector.summary().items()}
+
+    return results
+
+
+def run_hierarchy(navigator, rng, queries):
+    results = {}
+    handle = tempfile.NamedTemporaryFile(suffix='.json', delete=False)
+    handle.close()
+    cache_path = handle.name
+
+    try:
+        Path(cache_path).unlink()
+        start = time.perf_counter()
+        navigator.enable_hierarchy(cache_path)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        navigator.enable_hierarchy(cache_path)
+        load_ms = (time.perf_counter() - start) * 1000
+        size_kb = Path(cache_path).stat().st_size / 1024
+    finally:
+        Path(cache_path).unlink(missing_ok=True)
+
+    results['hierarchy'] = {
+        'portals': sum(len(portals) for portals in navigator.hierarchy.portals.values()),
+        'build_ms': round(build_ms, 2),
+        'load_ms': round(load_ms, 2),
+        'size_kb': round(size_kb, 1),
+    }
+
+    node_ids = list(navigator.nodes)
+    pairs = [(rng.choice(node_ids), rng.choice(node_ids)) for _ in range(queries)]
+    results['dijkstra'] = time_calls(navigator.dijkstra, pairs)
+    results['hierarchical_route'] = time_calls(navigator.hierarchical_route, pairs)
+
+    mismatches = 0
+    for start_id, end_id in pairs:
+        flat = navigator.dijkstra(start_id, end_id)
+        fast = navigator.hierarchical_route(start_id, end_id)
+        if (flat and flat.distance) != (fast and fast.distance):
+            mismatches += 1
+    results['hierarchy']['distance_mismatches'] = mismatches
+
+    return results
+
+
+def print_report(results):
+    construction = results['construction']
+    print(f"Nodes: {construction['nodes']}  Edges: {construction['edges']}  "
+          f"Build: {construction['build_ms']} ms  Peak memory: {construction['peak_memory_mb']} MB\n")
+    print(f"{'benchmark':22} {'calls':>6} {'mean ms':>10} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}")
+    print('-' * 72)
+    for name, r in results.items():
+        if name in ('construction', 'hierarchy', 'search_stats'):
+            continue
+        print(f"{name:22} {r['calls']:>6} {r['mean_ms']:>10} {r['p50_ms']:>10} {r['p95_ms']:>10} {r['p99_ms']:>10}")
+
+    if 'hierarchy' in results:
+        hierarchy = results['hierarchy']
+        print(f"\nHierarchy: {hierarchy['portals']} portals, build {hierarchy['build_ms']} ms, "
+              f"load {hierarchy['load_ms']} ms, {hierarchy['size_kb']} KB on disk, "
+              f"{hierarchy['distance_mismatches']} distance mismatches vs dijkstra")
+
+    if 'search_stats' in results:
+        print(f"\n{'operation':22} {'pushes':>10} {'pops':>10} {'settled':>10} {'lookups':>8} {'scans':>10} {'fallbacks':>9}")
+        print('-' * 84)
+        for name, c in results['search_stats'].items():
+            print(f"{name:22} {c['heap_pushes']:>10} {c['heap_pops']:>10} {c['nodes_settled']:>10} "
+                  f"{c['index_lookups']:>8} {c['index_scans']:>10} {c['fallback_passes']:>9}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Micro-benchmarks for CampusNavigator on generated campus maps')
+    parser.add_argument('--buildings', type=int, default=10)
+    parser.add_argument('--floors', type=int, default=5)
+    parser.add_argument('--rooms-per-floor', type=int, default=200)
+    parser.add_argument('--stairwells', type=int, default=1, help='Stairwells per floor (portals between floors)')
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--hierarchy', action='store_true',
+                        help='Also build the floor hierarchy and compare hierarchical_route against dijkstra')
+    parser.add_argument('--stats', action='store_true', help='Collect and print search counters (adds some overhead)')
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--json', dest='json_path', help='Write results to this JSON file')
+    args = parser.parse_args(argv)
+
+    print("=== CampusNavigator Benchmark ===\n")
+    results = run(args.buildings, args.floors, args.rooms_per_floor, args.queries, args.seed,
+                  args.stairwells, args.hierarchy, args.stats)
+    print_report(results)
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    return results
+
+
+if __name__ == '__main__':
+    main()
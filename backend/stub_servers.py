@@ -0,0 +1,176 @@
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubConfig:
+    def __init__(self, latency_ms=50.0, jitter_ms=0.0, rate_limit_ratio=0.0,
+                 stream_chunks=8, seed=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_limit_ratio = rate_limit_ratio
+        self.stream_chunks = stream_chunks
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.rate_limited = 0
+
+    def delay(self):
+        with self.lock:
+            jitter = self.random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        time.sleep(max(0.0, self.latency_ms + jitter) / 1000.0)
+
+    def should_rate_limit(self):
+        with self.lock:
+            self.requests += 1
+            limited = self.rate_limit_ratio > 0 and self.random.random() < self.rate_limit_ratio
+            if limited:
+                self.rate_limited += 1
+            return limited
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    config = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def _send_json(self, status, body, headers=None):
+        raw = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(raw)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(raw)
+
+
+class OpenRouterStubHandler(_StubHandler):
+    def do_POST(self):
+        body = self._read_body()
+        try:
+            payload = json.loads(body or b'{}')
+        except ValueError:
+            self._send_json(400, {'error': {'message': 'Invalid JSON'}})
+            return
+
+        if self.config.should_rate_limit():
+            self._send_json(429, {'error': {'code': 429, 'message': 'Rate limit exceeded'}},
+                            headers={'Retry-After': '1'})
+            return
+
+        self.config.delay()
+
+        model = payload.get('model', 'stub/model')
+        messages = payload.get('messages', [])
+        last = messages[-1].get('content', '') if messages else ''
+        content = f"Stub reply to: {last[:80]}"
+
+        if payload.get('stream'):
+            self._stream(model, content)
+            return
+
+        self._send_json(200, {
+            'id': 'gen-stub',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': model,
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': content},
+                'finish_reason': 'stop'
+            }],
+            'usage': {'prompt_tokens': len(body) // 4, 'completion_tokens': len(content) // 4}
+        })
+
+    def _stream(self, model, content):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+
+        chunks = max(1, self.config.stream_chunks)
+        step = max(1, len(content) // chunks)
+        for i in range(0, len(content), step):
+            event = {
+                'id': 'gen-stub',
+                'object': 'chat.completion.chunk',
+                'model': model,
+                'choices': [{'index': 0, 'delta': {'content': content[i:i + step]}}]
+            }
+            self.wfile.write(f"data: {json.dumps(event)}\n\n".encode('utf-8'))
+            self.wfile.flush()
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.close_connection = True
+
+
+class OCRStubHandler(_StubHandler):
+    def do_POST(self):
+        body = self._read_body()
+
+        if self.config.should_rate_limit():
+            self._send_json(429, {'IsErroredOnProcessing': True, 'ErrorMessage': ['Rate limit exceeded']})
+            return
+
+        self.config.delay()
+
+        self._send_json(200, {
+            'ParsedResults': [{
+                'ParsedText': f"Stub OCR text ({len(body)} bytes received)",
+                'FileParseExitCode': 1
+            }],
+            'OCRExitCode': 1,
+            'IsErroredOnProcessing': False,
+            'ProcessingTimeInMilliseconds': str(int(self.config.latency_ms))
+        })
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    # The default backlog of 5 drops connects under benchmark concurrency and
+    # the client retries after ~1s, which shows up as fake tail latency.
+    request_queue_size = 128
+
+
+class StubServer:
+    def __init__(self, handler, config, host='127.0.0.1', port=0):
+        handler_class = type(handler.__name__, (handler,), {'config': config})
+        self.config = config
+        self.httpd = _StubHTTPServer((host, port), handler_class)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def openrouter_stub(config=None, **kwargs):
+    return StubServer(OpenRouterStubHandler, config or StubConfig(), **kwargs)
+
+
+def ocr_stub(config=None, **kwargs):
+    return StubServer(OCRStubHandler, config or StubConfig(), **kwargs)
@@ -1,9 +1,17 @@
 import json
 import heapq
-from typing import Dict, List, Tuple, Optional, Set
+import hashlib
+import logging
+import os
+from typing import Dict, FrozenSet, List, Tuple, Optional, Set
 from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
+from restrictions import RestrictionTable
+from hierarchy import FloorHierarchy
+from instrumentation import SearchStats, StatsCollector, measure
+
+logger = logging.getLogger(__name__)
 
 class DayOfWeek(Enum):
     MONDAY = 0
@@ -33,9 +41,11 @@ class PathResult:
     uses_stairs: bool
     estimated_time_minutes: float
     accessibility_friendly: bool
+    stats: Optional[SearchStats] = None
 
 class CampusNavigator:
-    def __init__(self, json_file_path: str, accessibility_mode: bool = False):
+    def __init__(self, json_file_path: str, accessibility_mode: bool = False, restrictions_path: Optional[str] = None,
+                 previous: Optional['CampusNavigator'] = None):
         with open(json_file_path, 'r') as f:
             self.data = json.load(f)
         
@@ -46,32 +56,79 @@ class CampusNavigator:
         self.department_index = {}  
         self.service_index = {}  
         self.accessibility_mode = accessibility_mode
-        self.restricted_rooms = set()  
+        self.hierarchy = None
+        self.hierarchy_cache_path = None
+        self.stats: Optional[StatsCollector] = previous.stats if previous is not None else None
+        self.floor_signatures = {}
+        self._floor_fragments = {}
         
-        self._build_graph()
+        self._build_graph(previous)
         self._build_indexes()
+        self._init_restrictions(restrictions_path, previous)
+        
+        if previous is not None and previous.hierarchy is not None:
+            self.enable_hierarchy(previous.hierarchy_cache_path, previous.hierarchy)
+    
+    def _init_restrictions(self, restrictions_path: Optional[str], previous: Optional['CampusNavigator']):
+        node_ids = list(self.nodes)
+        if previous is not None and previous.restrictions.base_path == restrictions_path:
+            # Restrictions are keyed by node id, so the new map reads the same
+            # table and rooms that kept their id stay restricted.
+            if previous.restrictions.node_ids == node_ids:
+                self.restrictions = previous.restrictions
+            else:
+                self.restrictions = previous.restrictions.share(node_ids)
+            return
+        
+        self.restrictions = RestrictionTable(node_ids, restrictions_path)
+    
+    @property
+    def restricted_rooms(self) -> FrozenSet[str]:
+        return self.restrictions.snapshot()
+    
+    @property
+    def restrictions_version(self) -> int:
+        return self.restrictions.version
+    
+    def enable_stats(self, profiler=None, profile_every: int = 1) -> StatsCollector:
+        self.stats = StatsCollector(profiler, profile_every)
+        return self.stats
+    
+    def disable_stats(self):
+        self.stats = None
     
-    def _build_graph(self):
+    def _measured(self, operation: str, fn, *args):
+        stats = SearchStats(operation)
+        with measure(stats, self.stats):
+            result = fn(*args, stats)
+        return result, stats
+    
+    def _instrumented(self, operation: str, collect_stats: bool, fn, *args):
+        if not collect_stats and self.stats is None:
+            return fn(*args, None)
+        
+        result, stats = self._measured(operation, fn, *args)
+        if isinstance(result, PathResult):
+            result.stats = stats
+        return result
+    
+    def _build_graph(self, previous: Optional['CampusNavigator'] = None):
         floors = self.data['floors']
         
         
         for floor_key, floor_data in floors.items():
-            floor_name = floor_data['name']
-            floor_level = floor_data['level']
+            signature = hashlib.blake2b(json.dumps(floor_data, sort_keys=True).encode('utf-8'), digest_size=16).hexdigest()
+            self.floor_signatures[floor_key] = signature
+            
             
-            for location in floor_data['locations']:
-                node_id = location['id']
-                node = Node(
-                    id=node_id,
-                    name=location['name'],
-                    floor=floor_name,
-                    floor_level=floor_level,
-                    type=location['type'],
-                    full_name=location.get('fullName'),
-                    description=location.get('description')
-                )
-                self.nodes[node_id] = node
-                self.graph[node_id] = []
+            if previous is not None and previous.floor_signatures.get(floor_key) == signature:
+                self._floor_fragments[floor_key] = previous._floor_fragments[floor_key]
+            else:
+                self._floor_fragments[floor_key] = self._build_floor(floor_data)
+            
+            for node in self._floor_fragments[floor_key]['nodes']:
+                self.nodes[node.id] = node
+                self.graph[node.id] = []
         
         
         self._add_floor_connections()
@@ -84,8 +141,49 @@ class CampusNavigator:
         if self.accessibility_mode:
             self._add_elevator_connections()
     
+    def _build_floor(self, floor_data: Dict) -> Dict:
+        fragment = {'nodes': [], 'locations': {}, 'departments': {}, 'services': {}}
+        floor_name = floor_data['name']
+        floor_level = floor_data['level']
+        
+        for location in floor_data['locations']:
+            node = Node(
+                id=location['id'],
+                name=location['name'],
+                floor=floor_name,
+                floor_level=floor_level,
+                type=location['type'],
+                full_name=location.get('fullName'),
+                description=location.get('description')
+            )
+            fragment['nodes'].append(node)
+            
+            
+            fragment['locations'][node.name.lower()] = node.id
+            if node.full_name:
+                fragment['locations'][node.full_name.lower()] = node.id
+            
+            
+            if location['type'] == 'department':
+                fragment['departments'][location['name'].lower()] = location['id']
+                
+                for service in location.get('services', []):
+                    fragment['services'][service['name'].lower()] = {
+                        'department_id': location['id'],
+                        'service': service
+                    }
+        
+        return fragment
+    
     def _add_floor_connections(self):
         
+        corridors = self.data.get('corridors')
+        if corridors:
+            for corridor in corridors:
+                self._connect_sequential(corridor['locations'], weight=corridor.get('weight', 1))
+            return
+        
+        
         ground_locations = ['sps-org-chart', 'student-welfare', 'student-development', 
                            'institutional-programs', 'mis']
         self._connect_sequential(ground_locations, weight=1)
@@ -110,7 +208,7 @@ class CampusNavigator:
     
     def _add_stair_connections(self):
         
-        stair_connections = [
+        stair_connections = self.data.get('stairConnections') or [
             ('stairs-1f', 'mis', 2),  
             ('stairs-1f', 'stairs-2f', 3),  
             ('stairs-2f', 'stairs-3f', 3),  
@@ -129,83 +227,105 @@ class CampusNavigator:
     
     def _build_indexes(self):
         
-        for node_id, node in self.nodes.items():
-            name_lower = node.name.lower()
-            self.location_index[name_lower] = node_id
-            
-            
-            if node.full_name:
-                full_name_lower = node.full_name.lower()
-                self.location_index[full_name_lower] = node_id
+        for fragment in self._floor_fragments.values():
+            self.location_index.update(fragment['locations'])
+            self.department_index.update(fragment['departments'])
+            self.service_index.update(fragment['services'])
         
         
         for faculty in self.data.get('faculty', []):
             name_lower = faculty['name'].lower()
             self.faculty_index[name_lower] = faculty
+    
+    def enable_hierarchy(self, cache_path: Optional[str] = None, previous: Optional[FloorHierarchy] = None) -> FloorHierarchy:
+        cluster_of = {
+            location['id']: floor_key
+            for floor_key, floor_data in self.data['floors'].items()
+            for location in floor_data['locations']
+        }
         
+        hierarchy = None
+        if cache_path and os.path.exists(cache_path):
+            hierarchy = FloorHierarchy.load(cache_path, self.graph, cluster_of)
         
-        for floor_key, floor_data in self.data['floors'].items():
-            for location in floor_data['locations']:
-                
-                if location['type'] == 'department':
-                    dept_name = location['name'].lower()
-                    self.department_index[dept_name] = location['id']
-                    
-                    
-                    if 'services' in location:
-                        for service in location['services']:
-                            service_name = service['name'].lower()
-                            self.service_index[service_name] = {
-                                'department_id': location['id'],
-                                'service': service
-                            }
-    
-    def dijkstra(self, start_id: str, end_id: str) -> Optional[PathResult]:
+        if hierarchy is None:
+            hierarchy = FloorHierarchy.build(self.graph, cluster_of, previous)
+            if cache_path:
+                hierarchy.save(cache_path)
+        
+        self.hierarchy = hierarchy
+        self.hierarchy_cache_path = cache_path
+        return hierarchy
+    
+    def route(self, start_id: str, end_id: str, collect_stats: bool = False) -> Optional[PathResult]:
+        return self._instrumented('route', collect_stats, self._route, start_id, end_id)
+    
+    def _route(self, start_id: str, end_id: str, stats: Optional[SearchStats]) -> Optional[PathResult]:
+        if self.hierarchy is None:
+            return self._dijkstra(start_id, end_id, stats)
+        return self._hierarchical_route(start_id, end_id, stats)
+    
+    def hierarchical_route(self, start_id: str, end_id: str, collect_stats: bool = False) -> Optional[PathResult]:
+        return self._instrumented('hierarchical_route', collect_stats, self._hierarchical_route, start_id, end_id)
+    
+    def _hierarchical_route(self, start_id: str, end_id: str, stats: Optional[SearchStats]) -> Optional[PathResult]:
+        if start_id not in self.graph or end_id not in self.graph:
+            return None
+        
+        if self.hierarchy is None:
+            raise RuntimeError("Hierarchical routing is not enabled; call enable_hierarchy() first")
+        
+        restricted_rooms = self.restricted_rooms
+        if end_id in restricted_rooms:
+            logger.warning("Warning: %s is currently restricted or busy.", self.nodes[end_id].name)
+        
+        found = self.hierarchy.route(start_id, end_id, restricted_rooms, stats)
+        if found is None:
+            return None
+        
+        distance, path = found
+        return self._build_path_result(path, distance)
+    
+    def dijkstra(self, start_id: str, end_id: str, collect_stats: bool = False) -> Optional[PathResult]:
+        return self._instrumented('dijkstra', collect_stats, self._dijkstra, start_id, end_id)
+    
+    def _dijkstra(self, start_id: str, end_id: str, stats: Optional[SearchStats]) -> Optional[PathResult]:
         if start_id not in self.graph or end_id not in self.graph:
             return None
         
         
-        if end_id in self.restricted_rooms:
-            print(f"Warning: {self.nodes[end_id].name} is currently restricted or busy.")
+        restricted_rooms = self.restricted_rooms
+        if end_id in restricted_rooms:
+            logger.warning("Warning: %s is currently restricted or busy.", self.nodes[end_id].name)
         
         
         pq = [(0, start_id, [start_id])]
         visited = set()
         distances = {node_id: float('inf') for node_id in self.graph}
         distances[start_id] = 0
+        stale_pops = 0
         
         while pq:
             current_dist, current_node, path = heapq.heappop(pq)
             
             if current_node in visited:
+                stale_pops += 1
                 continue
             
             visited.add(current_node)
             
             
             if current_node == end_id:
-                nodes = [self.nodes[node_id] for node_id in path]
-                directions = self._generate_directions(nodes)
-                floor_changes = self._count_floor_changes(nodes)
-                uses_stairs = self._uses_stairs(nodes)
-                estimated_time = self._estimate_time(current_dist, floor_changes)
-                accessibility_friendly = not uses_stairs or self.accessibility_mode
-                
-                return PathResult(
-                    path=nodes,
-                    distance=current_dist,
-                    directions=directions,
-                    floor_changes=floor_changes,
-                    uses_stairs=uses_stairs,
-                    estimated_time_minutes=estimated_time,
-                    accessibility_friendly=accessibility_friendly
-                )
+                if stats is not None:
+                    pops = len(visited) + stale_pops
+                    stats.add_search(pops + len(pq), pops, len(visited))
+                return self._build_path_result(path, current_dist)
             
             
             for neighbor, weight in self.graph[current_node]:
                 if neighbor not in visited:
                     
-                    if neighbor in self.restricted_rooms and neighbor != end_id:
+                    if neighbor in restricted_rooms and neighbor != end_id:
                         continue
                     
                     new_dist = current_dist + weight
@@ -213,8 +333,29 @@ class CampusNavigator:
                         distances[neighbor] = new_dist
                         heapq.heappush(pq, (new_dist, neighbor, path + [neighbor]))
         
+        if stats is not None:
+            pops = len(visited) + stale_pops
+            stats.add_search(pops, pops, len(visited))
         return None
     
+    def _build_path_result(self, path: List[str], distance: int) -> PathResult:
+        nodes = [self.nodes[node_id] for node_id in path]
+        directions = self._generate_directions(nodes)
+        floor_changes = self._count_floor_changes(nodes)
+        uses_stairs = self._uses_stairs(nodes)
+        estimated_time = self._estimate_time(distance, floor_changes)
+        accessibility_friendly = not uses_stairs or self.accessibility_mode
+        
+        return PathResult(
+            path=nodes,
+            distance=distance,
+            directions=directions,
+            floor_changes=floor_changes,
+            uses_stairs=uses_stairs,
+            estimated_time_minutes=estimated_time,
+            accessibility_friendly=accessibility_friendly
+        )
+    
     def _count_floor_changes(self, nodes: List[Node]) -> int:
         changes = 0
         for i in range(1, len(nodes)):
@@ -278,38 +419,73 @@ class CampusNavigator:
         
         return directions
     
-    def find_location(self, query: str) -> Optional[str]:
+    def find_location(self, query: str, collect_stats: bool = False):
+        # Hot path: exact names are answered without any stats bookkeeping.
+        # With collect_stats=True the result comes back as (node_id, SearchStats).
+        if not collect_stats and self.stats is None:
+            node_id = self.location_index.get(query.lower())
+            return node_id if node_id is not None else self._find_location(query, None)
+        
+        result, stats = self._measured('find_location', self._find_location, query)
+        return (result, stats) if collect_stats else result
+    
+    def _find_location(self, query: str, stats: Optional[SearchStats]) -> Optional[str]:
         query_lower = query.lower()
         
         
         if query_lower in self.location_index:
+            if stats is not None:
+                stats.index_lookups += 1
             return self.location_index[query_lower]
         
         
         if query_lower in self.department_index:
+            if stats is not None:
+                stats.index_lookups += 2
             return self.department_index[query_lower]
         
         
         if query_lower in self.service_index:
+            if stats is not None:
+                stats.index_lookups += 3
             return self.service_index[query_lower]['department_id']
         
+        if stats is not None:
+            stats.index_lookups += 3
+        
         
         for name, node_id in self.location_index.items():
             if query_lower in name or name in query_lower:
+                self._record_scans(stats, [self.location_index], name)
                 return node_id
         
         
         for dept_name, dept_id in self.department_index.items():
             if query_lower in dept_name:
+                self._record_scans(stats, [self.location_index, self.department_index], dept_name)
                 return dept_id
         
         
         for service_name, service_data in self.service_index.items():
             if query_lower in service_name:
+                self._record_scans(stats, [self.location_index, self.department_index, self.service_index], service_name)
                 return service_data['department_id']
         
+        self._record_scans(stats, [self.location_index, self.department_index, self.service_index])
         return None
     
+    @staticmethod
+    def _record_scans(stats: Optional[SearchStats], passes: List[Dict], matched_key: Optional[str] = None):
+        if stats is None:
+            return
+        
+        stats.fallback_passes += len(passes)
+        stats.index_scans += sum(len(index) for index in passes[:-1])
+        if matched_key is None:
+            stats.index_scans += len(passes[-1])
+        else:
+            stats.index_scans += list(passes[-1]).index(matched_key) + 1
+    
     def find_faculty(self, query: str) -> Optional[Dict]:
         query_lower = query.lower()
         
@@ -368,15 +544,25 @@ class CampusNavigator:
         
         return True
     
-    def mark_room_restricted(self, room_name: str, restricted: bool = True):
-        room_id = self.find_location(room_name)
+    def find_exact_location(self, query: str) -> Optional[str]:
+        if query in self.nodes:
+            return query
+        return self.location_index.get(query.lower())
+    
+    def mark_room_restricted(self, room_name: str, restricted: bool = True, exact: bool = False) -> Optional[str]:
+        room_id = self.find_exact_location(room_name) if exact else self.find_location(room_name)
         if room_id:
-            if restricted:
-                self.restricted_rooms.add(room_id)
-            else:
-                self.restricted_rooms.discard(room_id)
+            self.restrictions.set(room_id, restricted)
+        return room_id
+    
+    def search_all(self, query: str, collect_stats: bool = False):
+        if not collect_stats and self.stats is None:
+            return self._search_all(query, None)
+        
+        result, stats = self._measured('search_all', self._search_all, query)
+        return (result, stats) if collect_stats else result
     
-    def search_all(self, query: str) -> Dict[str, List]:
+    def _search_all(self, query: str, stats: Optional[SearchStats]) -> Dict[str, List]:
         query_lower = query.lower()
         results = {
             'locations': [],
@@ -416,42 +602,48 @@ class CampusNavigator:
             if query_lower in service_name:
                 results['services'].append(service_data['service'])
         
+        if stats is not None:
+            stats.index_scans += (len(self.location_index) + len(self.faculty_index) +
+                                  len(self.department_index) + len(self.service_index))
         return results
     
-    def navigate(self, start: str, destination: str) -> Optional[PathResult]:
-        start_id = self.find_location(start)
-        dest_id = self.find_location(destination)
+    def navigate(self, start: str, destination: str, collect_stats: bool = False) -> Optional[PathResult]:
+        return self._instrumented('navigate', collect_stats, self._navigate, start, destination)
+    
+    def _navigate(self, start: str, destination: str, stats: Optional[SearchStats]) -> Optional[PathResult]:
+        start_id = self._find_location(start, stats)
+        dest_id = self._find_location(destination, stats)
         
         if not start_id:
-            print(f"Could not find starting location: {start}")
+            logger.warning("Could not find starting location: %s", start)
             return None
         
         if not dest_id:
-            print(f"Could not find destination: {destination}")
+            logger.warning("Could not find destination: %s", destination)
             return None
         
-        return self.dijkstra(start_id, dest_id)
+        return self._route(start_id, dest_id, stats)
     
     def navigate_to_faculty(self, start: str, faculty_name: str, current_day: Optional[DayOfWeek] = None) -> Optional[PathResult]:
         start_id = self.find_location(start)
         if not start_id:
-            print(f"Could not find starting location: {start}")
+            logger.warning("Could not find starting location: %s", start)
             return None
         
         faculty = self.find_faculty(faculty_name)
         if not faculty:
-            print(f"Could not find faculty: {faculty_name}")
+            logger.warning("Could not find faculty: %s", faculty_name)
             return None
         
         
         is_available = self._check_faculty_availability(faculty, current_day)
         if not is_available:
-            print(f"⚠️  {faculty['name']} is typically not available on this day.")
-            print(f"   Schedule: {faculty.get('schedule', 'N/A')}")
+            logger.warning("⚠️  %s is typically not available on this day.", faculty['name'])
+            logger.warning("   Schedule: %s", faculty.get('schedule', 'N/A'))
         
         locations = self.get_faculty_locations(faculty_name, current_day)
         if not locations:
-            print(f"Could not find location for faculty: {faculty_name}")
+            logger.warning("Could not find location for faculty: %s", faculty_name)
             return None
         
         
@@ -459,13 +651,13 @@ class CampusNavigator:
         best_distance = float('inf')
         
         for room_id, floor_name, schedule in locations:
-            result = self.dijkstra(start_id, room_id)
+            result = self.route(start_id, room_id)
             if result and result.distance < best_distance:
                 best_distance = result.distance
                 best_result = result
         
         if best_result and faculty.get('role'):
-            print(f"ℹ️  {faculty['name']} - {faculty['role']}")
+            logger.info("ℹ️  %s - %s", faculty['name'], faculty['role'])
         
         return best_result
     
@@ -501,6 +693,8 @@ class CampusNavigator:
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    
     print("🎓 CAMPUS NAVIGATION SYSTEM")
     print("=" * 70)
     
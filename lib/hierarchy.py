@@ -0,0 +1,242 @@
+import hashlib
+import heapq
+import json
+import os
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from instrumentation import SearchStats
+
+
+FORMAT_VERSION = 1
+
+Shortcut = Tuple[str, int, List[str]]
+
+
+def cluster_fingerprints(graph: Dict[str, List[Tuple[str, int]]], cluster_of: Dict[str, str]) -> Dict[str, str]:
+    digests = {}
+    for node_id in sorted(graph):
+        digest = digests.setdefault(cluster_of[node_id], hashlib.blake2b(digest_size=16))
+        digest.update(f"{node_id}\n".encode('utf-8'))
+        for neighbor, weight in sorted(graph[node_id]):
+            digest.update(f"  {neighbor}\t{cluster_of[neighbor]}\t{weight}\n".encode('utf-8'))
+    return {cluster: digest.hexdigest() for cluster, digest in digests.items()}
+
+
+def graph_fingerprint(fingerprints: Dict[str, str]) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    for cluster in sorted(fingerprints):
+        digest.update(f"{cluster}\t{fingerprints[cluster]}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+# One-level overlay: every floor is a cluster, nodes with an edge into another
+# floor (stairs, elevators, building links) are its portals, and each portal
+# keeps precomputed shortest paths to the other portals of its floor. Queries
+# search the start and end floors locally and only the small portal graph in
+# between.
+class FloorHierarchy:
+    def __init__(self, graph: Dict[str, List[Tuple[str, int]]], cluster_of: Dict[str, str]):
+        self.graph = graph
+        self.cluster_of = cluster_of
+        self.portals: Dict[str, List[str]] = {}
+        self.shortcuts: Dict[str, List[Shortcut]] = {}
+        self.cluster_fingerprints = cluster_fingerprints(graph, cluster_of)
+        self.fingerprint = graph_fingerprint(self.cluster_fingerprints)
+        self._blocked_shortcuts: Dict[str, Tuple[FrozenSet[str], Dict[str, List[Shortcut]]]] = {}
+
+    @classmethod
+    def build(cls, graph: Dict[str, List[Tuple[str, int]]], cluster_of: Dict[str, str],
+              previous: Optional['FloorHierarchy'] = None) -> 'FloorHierarchy':
+        hierarchy = cls(graph, cluster_of)
+        for node_id, edges in graph.items():
+            if any(cluster_of[neighbor] != cluster_of[node_id] for neighbor, _ in edges):
+                hierarchy.portals.setdefault(cluster_of[node_id], []).append(node_id)
+
+        for cluster, portals in hierarchy.portals.items():
+            # Shortcuts only depend on the floor's own nodes and edges, so
+            # unchanged floors can keep the previous build's results.
+            if previous is not None and previous.cluster_fingerprints.get(cluster) == hierarchy.cluster_fingerprints[cluster]:
+                hierarchy.shortcuts.update((portal, previous.shortcuts.get(portal, [])) for portal in portals)
+            else:
+                hierarchy.shortcuts.update(hierarchy._cluster_shortcuts(cluster, frozenset()))
+        return hierarchy
+
+    @classmethod
+    def load(cls, path: str, graph: Dict[str, List[Tuple[str, int]]], cluster_of: Dict[str, str]) -> Optional['FloorHierarchy']:
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        hierarchy = cls(graph, cluster_of)
+        if data.get('format') != FORMAT_VERSION or data.get('fingerprint') != hierarchy.fingerprint:
+            return None
+
+        hierarchy.portals = data['portals']
+        hierarchy.shortcuts = {
+            portal: [(target, distance, path) for target, distance, path in shortcuts]
+            for portal, shortcuts in data['shortcuts'].items()
+        }
+        return hierarchy
+
+    def save(self, path: str):
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump({
+                'format': FORMAT_VERSION,
+                'fingerprint': self.fingerprint,
+                'portals': self.portals,
+                'shortcuts': self.shortcuts
+            }, f)
+        os.replace(temp_path, path)
+
+    def _local_search(self, source: str, blocked: FrozenSet[str], allowed: Optional[str] = None,
+                      stats: Optional[SearchStats] = None) -> Tuple[Dict[str, int], Dict[str, Optional[str]]]:
+        cluster = self.cluster_of[source]
+        distances = {source: 0}
+        previous: Dict[str, Optional[str]] = {source: None}
+        visited = set()
+        pq = [(0, source)]
+        stale_pops = 0
+
+        while pq:
+            current_dist, current_node = heapq.heappop(pq)
+            if current_node in visited:
+                stale_pops += 1
+                continue
+            visited.add(current_node)
+
+            for neighbor, weight in self.graph[current_node]:
+                if neighbor in visited or self.cluster_of[neighbor] != cluster:
+                    continue
+                if neighbor in blocked and neighbor != allowed:
+                    continue
+
+                new_dist = current_dist + weight
+                if new_dist < distances.get(neighbor, float('inf')):
+                    distances[neighbor] = new_dist
+                    previous[neighbor] = current_node
+                    heapq.heappush(pq, (new_dist, neighbor))
+
+        if stats is not None:
+            pops = len(visited) + stale_pops
+            stats.add_search(pops, pops, len(visited))
+        return distances, previous
+
+    def _cluster_shortcuts(self, cluster: str, blocked: FrozenSet[str]) -> Dict[str, List[Shortcut]]:
+        shortcuts = {}
+        portals = self.portals.get(cluster, [])
+        for portal in portals:
+            if portal in blocked:
+                shortcuts[portal] = []
+                continue
+
+            distances, previous = self._local_search(portal, blocked)
+            shortcuts[portal] = [
+                (target, distances[target], _unwind(previous, target))
+                for target in portals
+                if target != portal and target in distances
+            ]
+        return shortcuts
+
+    def _shortcuts_for(self, portal: str, blocked: FrozenSet[str]) -> List[Shortcut]:
+        if not blocked:
+            return self.shortcuts.get(portal, [])
+
+        cluster = self.cluster_of[portal]
+        blocked_here = frozenset(node_id for node_id in blocked if self.cluster_of.get(node_id) == cluster)
+        if not blocked_here:
+            return self.shortcuts.get(portal, [])
+
+        cached = self._blocked_shortcuts.get(cluster)
+        if cached is None or cached[0] != blocked_here:
+            cached = (blocked_here, self._cluster_shortcuts(cluster, blocked_here))
+            self._blocked_shortcuts[cluster] = cached
+        return cached[1].get(portal, [])
+
+    def route(self, start_id: str, end_id: str, blocked: FrozenSet[str] = frozenset(),
+              stats: Optional[SearchStats] = None) -> Optional[Tuple[int, List[str]]]:
+        if start_id == end_id:
+            return 0, [start_id]
+
+        start_dist, start_prev = self._local_search(start_id, blocked, end_id, stats)
+        end_dist, end_prev = self._local_search(end_id, blocked, start_id, stats)
+        end_cluster = self.cluster_of[end_id]
+
+        best = start_dist.get(end_id, float('inf'))
+        meet = None
+
+        distances: Dict[str, int] = {}
+        parents: Dict[str, Tuple[Optional[str], List[str]]] = {}
+        pq = []
+        for portal in self.portals.get(self.cluster_of[start_id], []):
+            if portal in start_dist:
+                distances[portal] = start_dist[portal]
+                parents[portal] = (None, _unwind(start_prev, portal))
+                heapq.heappush(pq, (start_dist[portal], portal))
+
+        visited = set()
+        pops = 0
+        while pq:
+            current_dist, current_node = heapq.heappop(pq)
+            pops += 1
+            if current_dist >= best:
+                break
+            if current_node in visited:
+                continue
+            visited.add(current_node)
+
+            if self.cluster_of[current_node] == end_cluster and current_node in end_dist:
+                candidate = current_dist + end_dist[current_node]
+                if candidate < best:
+                    best = candidate
+                    meet = current_node
+
+            edges = [(target, distance, path[1:]) for target, distance, path in self._shortcuts_for(current_node, blocked)]
+            edges.extend(
+                (neighbor, weight, [neighbor])
+                for neighbor, weight in self.graph[current_node]
+                if self.cluster_of[neighbor] != self.cluster_of[current_node]
+                and (neighbor not in blocked or neighbor == end_id)
+            )
+
+            for neighbor, weight, segment in edges:
+                if neighbor in visited:
+                    continue
+                new_dist = current_dist + weight
+                if new_dist < distances.get(neighbor, float('inf')):
+                    distances[neighbor] = new_dist
+                    parents[neighbor] = (current_node, segment)
+                    heapq.heappush(pq, (new_dist, neighbor))
+
+        if stats is not None:
+            stats.add_search(pops + len(pq), pops, len(visited))
+
+        if best == float('inf'):
+            return None
+
+        if meet is None:
+            return best, _unwind(start_prev, end_id)
+
+        segments = []
+        node = meet
+        while node is not None:
+            node, segment = parents[node]
+            segments.append(segment)
+
+        path = [node_id for segment in reversed(segments) for node_id in segment]
+        node = end_prev[meet]
+        while node is not None:
+            path.append(node)
+            node = end_prev[node]
+        return best, path
+
+
+def _unwind(previous: Dict[str, Optional[str]], node_id: str) -> List[str]:
+    path = []
+    while node_id is not None:
+        path.append(node_id)
+        node_id = previous[node_id]
+    path.reverse()
+    return path
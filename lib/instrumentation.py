@@ -0,0 +1,114 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import asdict, dataclass
+from typing import Callable, ContextManager, Dict, List, Optional
+
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open.
+HISTOGRAM_BOUNDS_MS = [0.01, 0.03, 0.1, 0.3, 1, 3, 10, 30, 100, 300, 1000, 3000]
+
+COUNTERS = ['heap_pushes', 'heap_pops', 'nodes_settled', 'index_lookups', 'index_scans', 'fallback_passes']
+
+
+@dataclass
+class SearchStats:
+    operation: str
+    elapsed_ms: float = 0.0
+    heap_pushes: int = 0
+    heap_pops: int = 0
+    nodes_settled: int = 0
+    index_lookups: int = 0
+    index_scans: int = 0
+    fallback_passes: int = 0
+
+    def add_search(self, pushes: int, pops: int, settled: int):
+        self.heap_pushes += pushes
+        self.heap_pops += pops
+        self.nodes_settled += settled
+
+    def as_dict(self) -> Dict:
+        return asdict(self)
+
+
+class StatsCollector:
+    def __init__(self, profiler: Optional[Callable[[str], ContextManager]] = None, profile_every: int = 1):
+        self.profiler = profiler
+        self.profile_every = max(1, profile_every)
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._operations: Dict[str, Dict] = {}
+
+    def profile(self, operation: str) -> ContextManager:
+        if self.profiler is None:
+            return nullcontext()
+        with self._lock:
+            self._calls += 1
+            sampled = self._calls % self.profile_every == 0
+        return self.profiler(operation) if sampled else nullcontext()
+
+    def record(self, stats: SearchStats):
+        bucket = bisect.bisect_left(HISTOGRAM_BOUNDS_MS, stats.elapsed_ms)
+        with self._lock:
+            entry = self._operations.get(stats.operation)
+            if entry is None:
+                entry = {
+                    'count': 0,
+                    'total_ms': 0.0,
+                    'max_ms': 0.0,
+                    'histogram': [0] * (len(HISTOGRAM_BOUNDS_MS) + 1),
+                    'counters': dict.fromkeys(COUNTERS, 0)
+                }
+                self._operations[stats.operation] = entry
+
+            entry['count'] += 1
+            entry['total_ms'] += stats.elapsed_ms
+            entry['max_ms'] = max(entry['max_ms'], stats.elapsed_ms)
+            entry['histogram'][bucket] += 1
+            for name in COUNTERS:
+                entry['counters'][name] += getattr(stats, name)
+
+    def summary(self) -> Dict[str, Dict]:
+        with self._lock:
+            operations = {
+                name: dict(entry, histogram=list(entry['histogram']), counters=dict(entry['counters']))
+                for name, entry in self._operations.items()
+            }
+
+        for entry in operations.values():
+            entry['mean_ms'] = entry['total_ms'] / entry['count']
+            entry['p50_ms'] = _histogram_percentile(entry['histogram'], 50, entry['max_ms'])
+            entry['p95_ms'] = _histogram_percentile(entry['histogram'], 95, entry['max_ms'])
+            entry['p99_ms'] = _histogram_percentile(entry['histogram'], 99, entry['max_ms'])
+        return operations
+
+    def reset(self):
+        with self._lock:
+            self._operations.clear()
+            self._calls = 0
+
+
+@contextmanager
+def measure(stats: SearchStats, collector: Optional[StatsCollector]):
+    with collector.profile(stats.operation) if collector else nullcontext():
+        started = time.perf_counter()
+        try:
+            yield stats
+        finally:
+            stats.elapsed_ms += (time.perf_counter() - started) * 1000
+    if collector is not None:
+        collector.record(stats)
+
+
+def _histogram_percentile(histogram: List[int], pct: float, max_ms: float) -> float:
+    total = sum(histogram)
+    if not total:
+        return 0.0
+    threshold = total * pct / 100.0
+    running = 0
+    for i, count in enumerate(histogram):
+        running += count
+        if running >= threshold:
+            return min(HISTOGRAM_BOUNDS_MS[i], max_ms) if i < len(HISTOGRAM_BOUNDS_MS) else max_ms
+    return max_ms
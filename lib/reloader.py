@@ -0,0 +1,89 @@
+import logging
+import os
+import threading
+from typing import Any, Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _file_stamp(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+# Holds the value loaded from a file and swaps in a freshly loaded one when the
+# file changes. The loader receives the previous value so it can reuse the
+# parts that did not change. Readers call get() and keep using the object they
+# got, so a query that started before a swap finishes on the old value.
+class ReloadableFile:
+    def __init__(self, path: str, loader: Callable[[str, Any], Any]):
+        self.path = str(path)
+        self.loader = loader
+        self._stamp = _file_stamp(self.path)
+        self._failed_stamp = None
+        self._value = loader(self.path, None)
+        self._reload_lock = threading.Lock()
+        self.reloads = 0
+        self.last_error: Optional[str] = None
+
+    def get(self) -> Any:
+        return self._value
+
+    def check(self) -> bool:
+        stamp = _file_stamp(self.path)
+        if stamp is None or stamp in (self._stamp, self._failed_stamp):
+            return False
+        return self.reload(stamp)
+
+    def reload(self, stamp: Optional[Tuple[int, int]] = None) -> bool:
+        with self._reload_lock:
+            stamp = stamp or _file_stamp(self.path)
+            try:
+                value = self.loader(self.path, self._value)
+            except Exception as e:
+                # Most likely a half-written file; keep serving the old value
+                # and try again on the next change.
+                self._failed_stamp = stamp
+                self.last_error = f"{type(e).__name__}: {e}"
+                logger.warning("Failed to reload %s: %s", self.path, self.last_error)
+                return False
+
+            self._value = value
+            self._stamp = stamp
+            self.reloads += 1
+            self.last_error = None
+            return True
+
+
+class FileWatcher:
+    def __init__(self, files: List[ReloadableFile], interval: float = 2.0):
+        self.files = files
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def poll(self):
+        for reloadable in self.files:
+            try:
+                reloadable.check()
+            except Exception:
+                logger.exception("Error while checking %s", reloadable.path)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.poll()
+
+    def start(self) -> 'FileWatcher':
+        if self.interval > 0 and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='file-watcher', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
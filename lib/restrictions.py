@@ -0,0 +1,296 @@
+import hashlib
+import mmap
+import os
+import stat
+import struct
+import threading
+import time
+from typing import Dict, FrozenSet, List, Optional
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+MAGIC = b'RRHT'
+FORMAT_VERSION = 3
+# magic, format, version counter, table capacity, used slots
+HEADER = struct.Struct('<4sIQQQ')
+# node id hash (0 = empty slot), restricted flag
+ENTRY = struct.Struct('<QB7x')
+VERSION_OFFSET = 8
+CAPACITY_OFFSET = 16
+USED_OFFSET = 24
+MIN_CAPACITY = 64
+SNAPSHOT_RETRIES = 1000
+
+
+def node_hash(node_id: str) -> int:
+    value = int.from_bytes(hashlib.blake2b(node_id.encode('utf-8'), digest_size=8).digest(), 'little')
+    return value or 1
+
+
+def capacity_for(count: int) -> int:
+    capacity = MIN_CAPACITY
+    while capacity < 2 * count:
+        capacity *= 2
+    return capacity
+
+
+def _table_size(capacity: int) -> int:
+    return HEADER.size + capacity * ENTRY.size
+
+
+def _open_owned(path: str) -> int:
+    # The file decides which rooms are restricted and may be truncated on
+    # open, so refuse symlinks and files that belong to someone else.
+    fd = os.open(path, os.O_RDWR | os.O_CREAT | getattr(os, 'O_NOFOLLOW', 0), 0o600)
+    info = os.fstat(fd)
+    if not stat.S_ISREG(info.st_mode) or (hasattr(os, 'getuid') and info.st_uid != os.getuid()):
+        os.close(fd)
+        raise PermissionError(f'Restrictions file {path} must be a regular file owned by the current user')
+    return fd
+
+
+class _Storage:
+    def __init__(self, path: Optional[str], capacity: int):
+        self.path = path
+        self.lock = threading.RLock()
+
+        if path is None:
+            self.fd = None
+            self.capacity = capacity
+            self.mmap = mmap.mmap(-1, _table_size(capacity))
+            HEADER.pack_into(self.mmap, 0, MAGIC, FORMAT_VERSION, 0, capacity, 0)
+        else:
+            self.fd = _open_owned(path)
+            with self.file_lock():
+                self._open_shared(capacity)
+
+    def _open_shared(self, capacity: int):
+        os.lseek(self.fd, 0, os.SEEK_SET)
+        header = os.read(self.fd, HEADER.size)
+        if len(header) == HEADER.size:
+            magic, fmt, version, file_capacity, _ = HEADER.unpack(header)
+        else:
+            magic, fmt, version, file_capacity = b'', 0, 0, 0
+
+        if (magic, fmt) != (MAGIC, FORMAT_VERSION) or file_capacity <= 0 or os.fstat(self.fd).st_size < _table_size(file_capacity):
+            # New or unreadable file: start from an empty table. No worker can
+            # have it mapped with a valid header, so resizing it is safe.
+            os.ftruncate(self.fd, 0)
+            os.ftruncate(self.fd, _table_size(capacity))
+            self.mmap = mmap.mmap(self.fd, _table_size(capacity))
+            HEADER.pack_into(self.mmap, 0, MAGIC, FORMAT_VERSION, 0, capacity, 0)
+            file_capacity = capacity
+        else:
+            self.mmap = mmap.mmap(self.fd, _table_size(file_capacity))
+            if version % 2:
+                # Writers hold the file lock for the whole update, so an odd
+                # version seen here was left by a writer that died mid-update.
+                struct.pack_into('<Q', self.mmap, VERSION_OFFSET, version + 1)
+        self.capacity = file_capacity
+
+    def refresh(self):
+        # Another worker may have grown the file; the header is shared, so a
+        # capacity change shows up in our (smaller) mapping as well.
+        capacity = struct.unpack_from('<Q', self.mmap, CAPACITY_OFFSET)[0]
+        if capacity != self.capacity and self.fd is not None:
+            with self.lock:
+                if capacity != self.capacity:
+                    # The old mapping is left to the garbage collector since
+                    # readers in other threads may still hold it.
+                    self.mmap = mmap.mmap(self.fd, _table_size(capacity))
+                    self.capacity = capacity
+
+    def resize(self, capacity: int):
+        # Caller holds both locks and has the version odd.
+        if self.fd is None:
+            resized = mmap.mmap(-1, _table_size(capacity))
+            resized[:HEADER.size] = self.mmap[:HEADER.size]
+            self.mmap = resized
+        else:
+            os.ftruncate(self.fd, _table_size(capacity))
+            self.mmap = mmap.mmap(self.fd, _table_size(capacity))
+        struct.pack_into('<Q', self.mmap, CAPACITY_OFFSET, capacity)
+        self.capacity = capacity
+
+    @property
+    def used(self) -> int:
+        return struct.unpack_from('<Q', self.mmap, USED_OFFSET)[0]
+
+    @used.setter
+    def used(self, value: int):
+        struct.pack_into('<Q', self.mmap, USED_OFFSET, value)
+
+    def file_lock(self):
+        return _FileLock(self.fd)
+
+    def close(self):
+        self.mmap.close()
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+# Restricted rooms live in an open-addressing table of node id hashes, either
+# in anonymous memory or in one file that every worker maps. Entries are keyed
+# by node id rather than by position, so the same table serves every version
+# of the map and a reload never has to copy restrictions anywhere. The table
+# is sized from the node count and grows under the file lock when it fills up.
+#
+# Version is bumped to an odd value before a write and to the next even value
+# after it, so readers can detect torn reads and caches can compare versions.
+class RestrictionTable:
+    def __init__(self, node_ids: List[str], path: Optional[str] = None,
+                 capacity: Optional[int] = None, storage: Optional[_Storage] = None):
+        self.node_ids = list(node_ids)
+        self.base_path = path
+        capacity = capacity or capacity_for(len(self.node_ids))
+        self.storage = storage or _Storage(path, capacity)
+        self._hashes: Dict[str, int] = {node_id: node_hash(node_id) for node_id in self.node_ids}
+        self._by_hash: Dict[int, str] = {h: node_id for node_id, h in self._hashes.items()}
+        self._cached = (None, frozenset())
+
+        self.storage.refresh()
+        if self.storage.capacity < capacity:
+            self._reserve(capacity)
+
+    def share(self, node_ids: List[str]) -> 'RestrictionTable':
+        return RestrictionTable(node_ids, self.base_path, storage=self.storage)
+
+    @property
+    def version(self) -> int:
+        return struct.unpack_from('<Q', self.storage.mmap, VERSION_OFFSET)[0]
+
+    def _entry(self, slot: int):
+        return ENTRY.unpack_from(self.storage.mmap, HEADER.size + slot * ENTRY.size)
+
+    def _find_slot(self, h: int) -> Optional[int]:
+        capacity = self.storage.capacity
+        for probe in range(capacity):
+            slot = (h + probe) % capacity
+            entry_hash, _ = self._entry(slot)
+            if entry_hash == h or entry_hash == 0:
+                return slot
+        return None
+
+    def _begin_write(self) -> int:
+        version = self.version
+        if version % 2:
+            # Left odd by a writer that died mid-update; we hold the file
+            # lock, so round up to keep odd meaning "write in progress".
+            version += 1
+        struct.pack_into('<Q', self.storage.mmap, VERSION_OFFSET, version + 1)
+        return version
+
+    def _end_write(self, version: int):
+        struct.pack_into('<Q', self.storage.mmap, VERSION_OFFSET, version + 2)
+
+    def _rebuild(self, min_capacity: int, extra: int = 0):
+        # Drops entries for rooms that are no longer restricted and grows the
+        # table until the kept entries plus `extra` fit under 3/4 load.
+        storage = self.storage
+        kept = [entry_hash for entry_hash, flag in ENTRY.iter_unpack(storage.mmap[HEADER.size:_table_size(storage.capacity)])
+                if entry_hash and flag]
+        capacity = max(storage.capacity, min_capacity)
+        while len(kept) + extra > capacity * 3 // 4:
+            capacity *= 2
+
+        if capacity != storage.capacity:
+            storage.resize(capacity)
+        storage.mmap[HEADER.size:_table_size(capacity)] = bytes(capacity * ENTRY.size)
+        for entry_hash in kept:
+            ENTRY.pack_into(storage.mmap, HEADER.size + self._find_slot(entry_hash) * ENTRY.size, entry_hash, 1)
+        storage.used = len(kept)
+
+    def _reserve(self, capacity: int):
+        storage = self.storage
+        with storage.lock, storage.file_lock():
+            storage.refresh()
+            if storage.capacity >= capacity:
+                return
+            version = self._begin_write()
+            try:
+                self._rebuild(capacity)
+            finally:
+                self._end_write(version)
+
+    def set(self, node_id: str, restricted: bool = True) -> bool:
+        if node_id not in self._hashes:
+            raise KeyError(node_id)
+
+        h = self._hashes[node_id]
+        storage = self.storage
+        storage.refresh()
+        with storage.lock, storage.file_lock():
+            storage.refresh()
+            slot = self._find_slot(h)
+            entry_hash, flag = self._entry(slot) if slot is not None else (0, 0)
+            if entry_hash == h and bool(flag) == restricted:
+                return False
+            if entry_hash != h and not restricted:
+                return False
+
+            version = self._begin_write()
+            try:
+                if entry_hash != h:
+                    if slot is None or storage.used + 1 > storage.capacity * 3 // 4:
+                        self._rebuild(storage.capacity, extra=1)
+                        slot = self._find_slot(h)
+                    storage.used += 1
+                ENTRY.pack_into(storage.mmap, HEADER.size + slot * ENTRY.size, h, 1 if restricted else 0)
+            finally:
+                self._end_write(version)
+        return True
+
+    def is_restricted(self, node_id: str) -> bool:
+        return node_id in self.snapshot()
+
+    def snapshot(self) -> FrozenSet[str]:
+        cached_version, cached = self._cached
+        if self.version == cached_version:
+            return cached
+
+        storage = self.storage
+        for _ in range(SNAPSHOT_RETRIES):
+            storage.refresh()
+            buf = storage.mmap
+            before = struct.unpack_from('<Q', buf, VERSION_OFFSET)[0]
+            if before % 2 == 0:
+                raw = buf[HEADER.size:_table_size(storage.capacity)]
+                if struct.unpack_from('<Q', buf, VERSION_OFFSET)[0] == before and len(raw) % ENTRY.size == 0:
+                    break
+            time.sleep(0)
+        else:
+            # A writer is stuck mid-update; serve what is there without
+            # caching it so the next call reads again.
+            raw = storage.mmap[HEADER.size:_table_size(storage.capacity)]
+            before = None
+
+        restricted = frozenset(
+            self._by_hash[entry_hash]
+            for entry_hash, flag in ENTRY.iter_unpack(raw)
+            if flag and entry_hash in self._by_hash
+        )
+        if before is not None:
+            self._cached = (before, restricted)
+        return restricted
+
+    def close(self):
+        self.storage.close()
+
+
+class _FileLock:
+    def __init__(self, fd: Optional[int]):
+        self.fd = fd
+
+    def __enter__(self):
+        if self.fd is not None and fcntl is not None:
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if self.fd is not None and fcntl is not None:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)